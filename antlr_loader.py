@@ -0,0 +1,59 @@
+from antlr4 import FileStream, CommonTokenStream, ParseTreeWalker
+
+from gramLexer import gramLexer
+from gramListener import gramListener
+from gramParser import gramParser
+from mdp import MDP
+
+
+class gramMDPListener(gramListener):
+
+    def __init__(self):
+        self.mdp = MDP()
+        self.sources = []
+        self.targets = []
+        self.actions = []
+        self.weights = []
+
+    def exitProgram(self, ctx):
+        self.mdp.update_probas(self.sources, self.targets, self.actions, self.weights)
+
+    def enterDefstate(self, ctx):
+        if ctx.INT():
+            self.mdp.add_state(str(ctx.ID()), int(str(ctx.INT())))
+        else:
+            self.mdp.add_state(str(ctx.ID()))
+
+    def enterDefactions(self, ctx):
+        self.mdp.add_actions([str(x) for x in ctx.ID()]) # type: ignore
+
+    def enterTransact(self, ctx):
+        ids = [str(x) for x in ctx.ID()] # type: ignore
+        dep = ids.pop(0)
+        act = ids.pop(0)
+        weights = [int(str(x)) for x in ctx.INT()] # type: ignore
+        self.add_transitions(dep, act, ids, weights)
+
+    def enterTransnoact(self, ctx):
+        ids = [str(x) for x in ctx.ID()] # type: ignore
+        dep = ids.pop(0)
+        weights = [int(str(x)) for x in ctx.INT()] # type: ignore
+        self.add_transitions(dep, None, ids, weights)
+
+    def add_transitions(self, dep, act, targets, weights):
+        self.sources += [dep] * len(targets)
+        self.actions += [act] * len(targets)
+        self.targets += targets
+        self.weights += weights
+
+
+def load_antlr(filename: str) -> MDP:
+    """Read a .mdp file with the ANTLR parser generated from gram.g4."""
+    lexer = gramLexer(FileStream(filename))
+    stream = CommonTokenStream(lexer)
+    parser = gramParser(stream)
+    tree = parser.program()
+    MDP_parser = gramMDPListener()
+    walker = ParseTreeWalker()
+    walker.walk(MDP_parser, tree)
+    return MDP_parser.mdp
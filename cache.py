@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from mdp import MDP
+
+MAGIC = b'MDPC'
+VERSION = 1
+ALIGNMENT = 64
+
+
+def cache_path(filename: str) -> str:
+    """Returns the path of the binary cache of a .mdp file, next to it."""
+    return filename + 'c'
+
+
+def file_digest(filename: str) -> str:
+    """Returns the SHA-256 digest of the content of a file."""
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def save_cache(mdp: MDP, filename: str, digest: str | None = None) -> None:
+    """Write a built MDP in the binary cache of its .mdp file.
+    The file starts with a JSON header holding the labels, the rewards and the
+    layout of the arrays of `MDP.BUILT_ARRAYS`, which follow as raw aligned
+    blocks so that they can be memory-mapped.
+
+    Args:
+        mdp (MDP): The built MDP.
+        filename (str): The .mdp file the MDP was read from.
+        digest (str, optional): The digest of the .mdp file, computed if not given.
+    """
+    arrays = {name: np.ascontiguousarray(getattr(mdp, name)) for name in MDP.BUILT_ARRAYS}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        'version': VERSION,
+        'source': digest or file_digest(filename),
+        'states': mdp.states_labels,
+        'rewards': mdp.rewards,
+        'actions': mdp.actions_labels,
+        'arrays': layout,
+    }).encode()
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+    path = cache_path(filename)
+    # write then rename, so that a concurrent run never reads a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+        for name, array in arrays.items():
+            file.seek(start + layout[name]['offset'])
+            file.write(array.tobytes())
+        file.truncate(start + offset)
+    os.replace(tmp_path, path)
+
+
+def load_cache(filename: str, digest: str | None = None) -> MDP | None:
+    """Load a built MDP from the binary cache of its .mdp file. The arrays are
+    memory-mapped read-only, so that the pages are shared between processes.
+
+    Args:
+        filename (str): The .mdp file.
+        digest (str, optional): The digest of the .mdp file, computed if not given.
+
+    Returns:
+        MDP | None: The MDP, or None if there is no cache up to date with the file.
+    """
+    path = cache_path(filename)
+    if not os.path.exists(path):
+        return None
+    # an empty or partial file, left by an interrupted copy for instance, is
+    # not an error: the caller parses the .mdp file and rewrites the cache
+    file_size = os.path.getsize(path)
+    if file_size < len(MAGIC) + 8:
+        return None
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        return None
+    size = int.from_bytes(bytes(buffer[len(MAGIC):len(MAGIC) + 8]), 'little')
+    start = -(-(len(MAGIC) + 8 + size) // ALIGNMENT) * ALIGNMENT
+    if start > file_size:
+        return None
+    try:
+        header = json.loads(bytes(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + size]))
+        if (header['version'] != VERSION
+                or list(header['arrays']) != list(MDP.BUILT_ARRAYS)
+                or header['source'] != (digest or file_digest(filename))):
+            return None
+        states, rewards, actions = header['states'], header['rewards'], header['actions']
+        arrays = {}
+        for name, layout in header['arrays'].items():
+            dtype = np.dtype(layout['dtype'])
+            shape = tuple(layout['shape'])
+            offset = start + layout['offset']
+            end = offset + int(np.prod(shape)) * dtype.itemsize
+            if end > file_size:
+                return None
+            arrays[name] = buffer[offset:end].view(dtype).reshape(shape)
+    except (ValueError, KeyError, TypeError):
+        return None
+    mdp = MDP()
+    mdp.states_labels = states
+    mdp.states_id = {label: i for i, label in enumerate(mdp.states_labels)}
+    mdp.nb_states = len(mdp.states_labels)
+    mdp.rewards = rewards
+    mdp.actions_labels = actions
+    mdp.actions_id = {action: i for i, action in enumerate(mdp.actions_labels)}
+    mdp.nb_actions = len(mdp.actions_labels)
+    for name, array in arrays.items():
+        setattr(mdp, name, array)
+    return mdp
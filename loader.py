@@ -0,0 +1,102 @@
+import gc
+import re
+
+from mdp import MDP
+
+ID = r'[a-zA-Z_][a-zA-Z_0-9]*'
+INT = r'[0-9]+'
+TRANSITION = re.compile(
+    rf'\s*(#\s*)?({ID})\s*(?:\[\s*({ID})\s*\]\s*)?->'
+    rf'(\s*{INT}\s*:\s*{ID}\s*(?:\+\s*{INT}\s*:\s*{ID}\s*)*);')
+TARGET = re.compile(rf'({INT})\s*:\s*({ID})')
+DEFINITION = re.compile(r'\s*(#\s*)?(States|Actions)(?![a-zA-Z_0-9])([^;]*);')
+DEFSTATE = re.compile(rf'\s*({ID})\s*(?::\s*({INT})\s*)?')
+DEFACTION = re.compile(rf'\s*({ID})\s*')
+
+
+def load_native(filename: str) -> MDP:
+    """Read a .mdp file without the ANTLR runtime, in a single pass over its
+    statements. It accepts the grammar of `gram.g4`: a statement preceded by
+    `#` is commented out until its `;`.
+
+    Args:
+        filename (str): The path of the .mdp file.
+
+    Raises:
+        SyntaxError: raised if the file does not follow the grammar.
+
+    Returns:
+        MDP: The MDP read from the file, not built yet.
+    """
+    with open(filename) as file:
+        text = file.read()
+    # only acyclic objects are created here: skip the garbage collector passes
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read(filename, text)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _read(filename: str, text: str) -> MDP:
+    """Read the content of a .mdp file, see `load_native`."""
+    mdp = MDP()
+    sources, actions, pairs = [], [], []
+    section = 'states'
+    pos, end = 0, len(text.rstrip())
+    while pos < end:
+        transition = TRANSITION.match(text, pos)
+        if transition is not None:
+            if section == 'states':
+                _syntax_error(filename, text, pos, "'States' expected")
+            section = 'transitions'
+            pos = transition.end()
+            comment, source, action, rhs = transition.groups()
+            if comment is None:
+                targets = TARGET.findall(rhs)
+                sources += [source] * len(targets)
+                actions += [action] * len(targets)
+                pairs += targets
+            continue
+        definition = DEFINITION.match(text, pos)
+        if definition is None:
+            _syntax_error(filename, text, pos, "invalid statement")
+        comment, keyword, body = definition.groups()  # type: ignore
+        if keyword == 'States':
+            if section != 'states' or comment:
+                _syntax_error(filename, text, pos, "unexpected 'States'")
+            states = [DEFSTATE.fullmatch(s) for s in body.split(',')]
+            if not all(states):
+                _syntax_error(filename, text, pos, "invalid state definition")
+            for state in states:
+                label, reward = state.groups()  # type: ignore
+                if reward is None:
+                    mdp.add_state(label)
+                else:
+                    mdp.add_state(label, int(reward))
+            section = 'actions'
+        else:
+            if section != 'actions':
+                _syntax_error(filename, text, pos, "unexpected 'Actions'")
+            labels = [DEFACTION.fullmatch(a) for a in body.split(',')]
+            if not all(labels):
+                _syntax_error(filename, text, pos, "invalid action definition")
+            if comment is None:
+                mdp.add_actions([label[1] for label in labels])  # type: ignore
+        pos = definition.end()  # type: ignore
+    if section != 'transitions':
+        _syntax_error(filename, text, pos, "no transition defined")
+    weights, targets = zip(*pairs) if pairs else ((), ())
+    mdp.update_probas(sources, list(targets), actions, list(map(int, weights)))
+    return mdp
+
+
+def _syntax_error(filename: str, text: str, position: int, message: str) -> None:
+    """Raise a syntax error located at a position of the file."""
+    while position < len(text) and text[position].isspace():
+        position += 1
+    line = text.count('\n', 0, position) + 1
+    column = position - text.rfind('\n', 0, position) - 1
+    raise SyntaxError(f"line {line}:{column} {message}", (filename, line, column + 1, None))
@@ -1,51 +1,18 @@
 import argparse
 
-from antlr4 import FileStream, CommonTokenStream, ParseTreeWalker
-
-from gramLexer import gramLexer
-from gramListener import gramListener
-from gramParser import gramParser
+from cache import file_digest, load_cache, save_cache
+from loader import load_native
 from mdp import MDP
 
 
-class gramMDPListener(gramListener):
-
-    def __init__(self):
-        self.mdp = MDP()
-        
-    def enterDefstate(self, ctx):
-        if ctx.INT():
-            self.mdp.add_state(str(ctx.ID()), int(str(ctx.INT())))
-        else:
-            self.mdp.add_state(str(ctx.ID()))
-
-    def enterDefactions(self, ctx):
-        self.mdp.add_actions([str(x) for x in ctx.ID()]) # type: ignore
-
-    def enterTransact(self, ctx):
-        ids = [str(x) for x in ctx.ID()] # type: ignore
-        dep = ids.pop(0)
-        act = ids.pop(0)
-        weights = [int(str(x)) for x in ctx.INT()] # type: ignore
-        for target, weight in zip(ids, weights):
-            self.mdp.update_proba(dep, target, act, weight)
-        
-    def enterTransnoact(self, ctx):
-        ids = [str(x) for x in ctx.ID()] # type: ignore
-        dep = ids.pop(0)
-        weights = [int(str(x)) for x in ctx.INT()] # type: ignore
-        for target, weight in zip(ids, weights):
-            self.mdp.update_proba(dep, target, None, weight)
-
-
 def main():
     # arg parse
     parser = argparse.ArgumentParser(
         prog='python main.py',
         description='Markov Decision Process Chains Analyser')
-    parser.add_argument('method', choices=['print', 'simulate', 'check_mc', 'check_mdp',
-                                           'check_mc_rewards', 'SMC', 'SMC_quali',
-                                           'RL_VI', 'RL_QL','draw'],
+    parser.add_argument('method', choices=['print', 'simulate', 'check_mc', 'check_mc_curve',
+                                           'check_mdp', 'check_mc_rewards', 'SMC', 'SMC_quali',
+                                           'RL_VI', 'RL_PI', 'RL_QL','draw'],
                         help="The method to use")
     parser.add_argument('filename',
                         help="The name of the file.")
@@ -75,40 +42,99 @@ def main():
                         help="Initial state label for the simulation, defaults to the first one.")
     parser.add_argument('-T', '--terminal-state', default=None,
                         help="The terminal state, used for SMC and SPRT. Required.")
+    parser.add_argument('-p', '--parser', choices=['antlr', 'native'], default='antlr',
+                        help="The parser used to read the file, defaults to 'antlr'.")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="Number of processes running the simulations of SMC and SMC_quali, defaults to 1.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed of the random simulations of SMC, SMC_quali and episodic RL_QL, "
+                             "for reproducible results.")
+    parser.add_argument('-c', '--cache', action='store_true',
+                        help="Load the built model from its binary cache (the file name "
+                             "followed by 'c'), which is created or refreshed if needed.")
+    parser.add_argument('--solver', choices=MDP.SOLVERS, default='auto',
+                        help="The linear solver of check_mc, check_mc_rewards and RL_PI for "
+                             "infinite steps, defaults to 'auto'.")
+    parser.add_argument('--tol', type=float, default=1e-10,
+                        help="The tolerance of the iterative solvers and of check_mc_curve, "
+                             "defaults to 1e-10.")
+    parser.add_argument('--engine', choices=['lp', 'vi', 'pi'], default='lp',
+                        help="The algorithm of check_mdp: linear programming, value "
+                             "iteration or policy iteration. Defaults to 'lp'.")
+    parser.add_argument('--objective', choices=['max', 'min'], default='max',
+                        help="Compute the maximal or minimal probabilities with check_mdp, "
+                             "defaults to 'max'. The 'lp' engine only computes the maximal ones.")
+    parser.add_argument('--variant', choices=MDP.VI_VARIANTS, default='jacobi',
+                        help="The order of the updates of RL_VI, defaults to 'jacobi'.")
+    parser.add_argument('--norm', choices=['l2', 'sup'], default='l2',
+                        help="The norm of the change of the values stopping RL_VI, except its prioritized "
+                             "variant, defaults to 'l2'.")
+    parser.add_argument('--episodic', action='store_true',
+                        help="Learn from episodes of n_steps from the initial state with RL_QL.")
+    parser.add_argument('--exploration', type=float, default=0.1,
+                        help="The probability of a random action in the episodes of RL_QL, "
+                             "defaults to 0.1.")
+    parser.add_argument('-o', '--output', default=None,
+                        help="The file to write the curve of check_mc_curve in.")
     args = parser.parse_args()
-    # lexer and grammar
-    lexer = gramLexer(FileStream(args.filename))
-    stream = CommonTokenStream(lexer)
-    parser = gramParser(stream)
-    tree = parser.program()
-    MDP_parser = gramMDPListener()
-    walker = ParseTreeWalker()
-    # parse file
-    walker.walk(MDP_parser, tree)
-    mdp = MDP_parser.mdp
-    mdp.build(args.initial_state)
+    if args.engine == 'lp' and args.objective == 'min':
+        parser.error("the 'lp' engine only computes the maximal probabilities")
+    # load the built model from the cache
+    mdp = None
+    if args.cache:
+        digest = file_digest(args.filename)
+        mdp = load_cache(args.filename, digest)
+    if mdp is not None:
+        mdp.set_initial_state(args.initial_state)
+    else:
+        # parse file
+        if args.parser == 'native':
+            mdp = load_native(args.filename)
+        else:
+            # the ANTLR runtime is slow to import: only load it when used
+            from antlr_loader import load_antlr
+            mdp = load_antlr(args.filename)
+        mdp.build(args.initial_state, args.verbose)
+        if args.cache:
+            save_cache(mdp, args.filename, digest)
     if args.method == 'print':
         print(mdp)
     elif args.method == 'simulate':
         mdp.simulate(args.n_steps, args.strategy, args.verbose)
     elif args.method == 'check_mc':
-        mdp.model_checking_mc(args.terminal_state, args.n_steps, args.verbose)
+        mdp.model_checking_mc(args.terminal_state, args.n_steps, args.verbose,
+                              args.solver, args.tol)
+    elif args.method == 'check_mc_curve':
+        mdp.model_checking_mc_curve(args.terminal_state, args.n_steps, args.verbose,
+                                    args.tol, args.output)
     elif args.method == 'check_mc_rewards':
-        mdp.model_checking_mc_rewards(args.n_steps, args.gamma, args.verbose)
+        mdp.model_checking_mc_rewards(args.n_steps, args.gamma, args.verbose,
+                                      args.solver, args.tol)
     elif args.method == 'check_mdp':
-        mdp.model_checking_mdp(args.terminal_state, args.verbose)
+        if args.engine == 'lp':
+            mdp.model_checking_mdp(args.terminal_state, args.verbose)
+        else:
+            mdp.model_checking_mdp_iterative(args.terminal_state, args.objective, args.engine,
+                                             args.verbose, args.tol, args.iter_max, args.solver)
     elif args.method == 'SMC':
         mdp.smc_mc_quantitatif(args.terminal_state, args.n_steps, args.epsilon,
-                               args.delta, args.verbose)
+                               args.delta, args.verbose, args.workers, args.seed)
     elif args.method == 'SMC_quali':
         mdp.smc_mc_qualitatif(args.terminal_state, args.n_steps, args.alpha,
                               args.beta, args.epsilon, args.theta,
-                              args.iter_max, args.verbose)
+                              args.iter_max, args.verbose, args.workers, args.seed)
     elif args.method == 'RL_VI':
         mdp.rl_value_iteration(args.gamma, args.epsilon, args.iter_max,
-                               args.verbose)
+                               args.verbose, args.variant, args.norm)
+    elif args.method == 'RL_PI':
+        mdp.rl_policy_iteration(args.gamma, args.iter_max, args.verbose,
+                                args.solver, args.tol)
     elif args.method == 'RL_QL':
-        mdp.rl_Q_learning(args.gamma, args.iter_max, args.verbose)
+        if args.episodic:
+            mdp.rl_Q_learning_episodic(args.gamma, args.iter_max, args.verbose, args.n_steps,
+                                       args.exploration, seed=args.seed)
+        else:
+            mdp.rl_Q_learning(args.gamma, args.iter_max, args.verbose)
     elif args.method == 'draw':
         mdp.draw_graph(args.filename.split('/')[-1][:-4], args.save)
 
@@ -1,18 +1,104 @@
-import matplotlib.pyplot as plt
-import networkx as nx
+import heapq
+import warnings
+from contextlib import nullcontext
+from time import perf_counter
+from typing import TYPE_CHECKING
+
 import numpy as np
-from scipy.optimize import linprog
 
 import strategies as strategy_module
 
+# heavy dependencies are imported by the methods using them, to start fast
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+
+class TransitionBuffer:
+    """Growable arrays of (source, action, target, weight) transitions, filled
+    while the model is read and turned into the CSR structure by `MDP.build`.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.size = 0
+        self.sources = np.empty(capacity, dtype=np.int64)
+        self.actions = np.empty(capacity, dtype=np.int64)
+        self.targets = np.empty(capacity, dtype=np.int64)
+        self.weights = np.empty(capacity, dtype=np.float64)
+
+    def reserve(self, n: int) -> None:
+        """Make room for n more transitions, doubling the capacity if needed.
+
+        Args:
+            n (int): The number of transitions to be added.
+        """
+        capacity = len(self.sources)
+        if self.size + n <= capacity:
+            return
+        capacity = max(2 * capacity, self.size + n)
+        for name in ('sources', 'actions', 'targets', 'weights'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def extend(
+        self,
+        sources: np.ndarray,
+        actions: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray
+    ) -> None:
+        """Add many transitions at the end of the buffer."""
+        n = len(sources)
+        self.reserve(n)
+        i = self.size
+        self.sources[i:i + n] = sources
+        self.actions[i:i + n] = actions
+        self.targets[i:i + n] = targets
+        self.weights[i:i + n] = weights
+        self.size += n
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the sources, actions, targets and weights filled so far."""
+        n = self.size
+        return self.sources[:n], self.actions[:n], self.targets[:n], self.weights[:n]
+
 
 class MDP:
+    # arrays computed by `build`, the whole built model with the labels and rewards
+    BUILT_ARRAYS = ('trans_ptr', 'trans_target', 'trans_proba',
+                    'alias_proba', 'alias_target',
+                    'enabled', 'enabled_ptr', 'enabled_actions',
+                    'pred_ptr', 'pred_source', 'absorbing')
+    # max number of states stored at once by the batched simulations
+    SIMULATION_BLOCK = 1 << 20
+    # the runs of `smc_mc_quantitatif` are split into at most `SMC_BLOCKS` blocks
+    # of at least `SMC_MIN_BLOCK` runs, each one drawn from its own random stream
+    SMC_BLOCKS = 64
+    SMC_MIN_BLOCK = 1 << 10
+    # solvers of the linear systems of the model checking, see `solve_linear`
+    SOLVERS = ('auto', 'dense', 'splu', 'gmres', 'bicgstab', 'jacobi', 'gauss-seidel')
+    # max number of unknowns solved with a dense, then a sparse factorization,
+    # the latter only for the systems with few nonzeros per row, which fill in less
+    DENSE_SOLVE_LIMIT = 1000
+    SPARSE_SOLVE_LIMIT = 5000
+    SPARSE_ROW_LIMIT = 4
+    # max number of iterations of the iterative solvers
+    SOLVER_ITER_MAX = 100_000
+    # max number of edges of a graph whose components are found in Python, see `index_components`
+    TARJAN_LIMIT = 1 << 16
+    # min number of unknowns solved at once by `solve_linear_by_components`
+    COMPONENT_BLOCK = 1 << 10
+    # orders of the updates of `rl_value_iteration`
+    VI_VARIANTS = ('jacobi', 'gauss-seidel', 'topological', 'prioritized')
 
     def __init__(self) -> None:
         self.actions_labels = []
         self.states_labels = []
         self.states_id = {}
         self.nb_states = 0
+        self.buffer = TransitionBuffer()
+        self.transitions_index = set()
         self.add_actions([None])
         self.rewards = []
 
@@ -32,7 +118,6 @@ class MDP:
         self.nb_states += 1
         self.states_id[label] = self.nb_states - 1
         self.rewards.append(reward)
-        self.probas = np.zeros((self.nb_states, self.nb_actions, self.nb_states))
 
     def add_actions(self, actions: list[str | None]) -> None:
         """Create multiple actions at once.
@@ -43,7 +128,19 @@ class MDP:
         self.actions_labels += actions
         self.actions_id = {action: i for i, action in enumerate(self.actions_labels)}
         self.nb_actions = len(self.actions_labels)
-        self.probas = np.zeros((self.nb_states, self.nb_actions, self.nb_states))
+
+    def state_id(self, label: str) -> int:
+        """Returns the index of a state from its label.
+
+        Args:
+            label (str): The label of the state.
+
+        Raises:
+            AssertionError: raised if the state is not declared.
+        """
+        state = self.states_id.get(label)
+        assert state is not None, f"State {label} is not declared."
+        return state
 
     def update_proba(
         self,
@@ -60,72 +157,512 @@ class MDP:
             action (str): The action label for this edge
             proba (float): The probability to take this edge for this action
         """
-        assert source_state in self.states_labels, f"Source state {source_state} is not declared."
-        assert target_state in self.states_labels, f"Target state {target_state} is not declared."
-        assert action in self.actions_labels, f"Action {action} is not declared."
-        source_id = self.states_id[source_state]
-        target_id = self.states_id[target_state]
-        action_id = self.actions_id[action]
-        assert self.probas[source_id, action_id, target_id]==0, (
-            f"Transition from {self.states_labels[source_id]} "
-            f"to {self.states_labels[target_id]} with action "
-            f"{self.actions_labels[action_id]} already defined")
-        self.probas[source_id, action_id, target_id] = proba
-
-    def normalize(self) -> None:        
+        self.update_probas([source_state], [target_state], [action], [proba])
+
+    def update_probas(
+        self,
+        source_states: list[str],
+        target_states: list[str],
+        actions: list[str | None],
+        probas: list[float]
+    ) -> None:
+        """Update many probas at once, checked in order as with `update_proba`.
+
+        Args:
+            source_states (list[str]): The source state label of each edge
+            target_states (list[str]): The target state label of each edge
+            actions (list[str | None]): The action label of each edge
+            probas (list[float]): The probability to take each edge for its action
+        """
+        source_ids = [self.states_id.get(s) for s in source_states]
+        target_ids = [self.states_id.get(t) for t in target_states]
+        action_ids = [self.actions_id.get(a) for a in actions]
+        keys = list(zip(source_ids, action_ids, target_ids))
+        if (None in source_ids or None in target_ids or None in action_ids
+                or len(set(keys)) != len(keys)
+                or not self.transitions_index.isdisjoint(keys)):
+            self.check_probas(source_states, target_states, actions, probas)
+        weights = np.asarray(probas, dtype=np.float64)
+        kept = weights != 0
+        if np.all(kept):
+            self.transitions_index.update(keys)
+        else:
+            self.transitions_index.update(k for k, w in zip(keys, kept) if w)
+        self.buffer.extend(
+            np.asarray(source_ids, dtype=np.int64)[kept],
+            np.asarray(action_ids, dtype=np.int64)[kept],
+            np.asarray(target_ids, dtype=np.int64)[kept],
+            weights[kept])
+
+    def check_probas(
+        self,
+        source_states: list[str],
+        target_states: list[str],
+        actions: list[str | None],
+        probas: list[float]
+    ) -> None:
+        """Check transitions one by one, to report the first invalid one.
+
+        Raises:
+            AssertionError: raised if a label is not declared, or if a
+                transition is already defined.
+        """
+        index = set(self.transitions_index)
+        for source_state, target_state, action, proba in zip(
+                source_states, target_states, actions, probas):
+            source_id = self.states_id.get(source_state)
+            assert source_id is not None, f"Source state {source_state} is not declared."
+            target_id = self.states_id.get(target_state)
+            assert target_id is not None, f"Target state {target_state} is not declared."
+            action_id = self.actions_id.get(action)
+            assert action_id is not None, f"Action {action} is not declared."
+            key = (source_id, action_id, target_id)
+            assert key not in index, (
+                f"Transition from {source_state} to {target_state} with action "
+                f"{action} already defined")
+            if proba:
+                index.add(key)
+
+    def compile_transitions(self) -> None:
+        """Store the transitions in CSR format, with one row per (state, action)
+        pair: the successors of the state `s` with the action `a` are
+        `trans_target[trans_ptr[r]:trans_ptr[r+1]]`, where `r = s * nb_actions + a`.
+        """
+        sources, actions, targets, weights = self.buffer.arrays()
+        rows = sources * self.nb_actions + actions
+        order = np.lexsort((targets, rows))
+        self.trans_target = targets[order]
+        self.trans_proba = weights[order]
+        counts = np.bincount(rows, minlength=self.nb_states * self.nb_actions)
+        self.trans_ptr = np.zeros(self.nb_states * self.nb_actions + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.trans_ptr[1:])
+        # the model is fixed from now on: release the building structures
+        self.buffer = TransitionBuffer()
+        self.transitions_index = set()
+
+    def normalize(self) -> None:
         """Transform transitions weights to probas"""
-        S = np.sum(self.probas, axis=(2))
-        for i in range(S.shape[0]):
-            for j in range(S.shape[1]):
-                if S[i, j]:
-                    for k in range(self.nb_states):
-                        self.probas[i, j, k] = self.probas[i, j, k] / S[i, j]
-
-    def actions_from(self, current_state: int) -> list[int]:
+        rows = np.repeat(np.arange(self.nb_states * self.nb_actions), np.diff(self.trans_ptr))
+        totals = np.bincount(rows, weights=self.trans_proba,
+                             minlength=self.nb_states * self.nb_actions)
+        self.trans_proba /= totals[rows]
+
+    def successors(self, state: int, action: int) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the successors of a state through an action.
+
+        Args:
+            state (int): The source state.
+            action (int): The action taken from the source state.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The target states and their probabilities.
+        """
+        r = state * self.nb_actions + action
+        start, end = self.trans_ptr[r], self.trans_ptr[r + 1]
+        return self.trans_target[start:end], self.trans_proba[start:end]
+
+    def transition_matrix(self, action: int | None = None) -> 'csr_matrix':
+        """Returns the transition probabilities as a sparse matrix.
+
+        Args:
+            action (int, optional): The action to restrict to. By default, all
+                actions are kept and the row `s * nb_actions + a` holds the
+                transitions of the state `s` through the action `a`.
+
+        Returns:
+            csr_matrix: A (nb_states, nb_states) matrix for one action, or a
+                (nb_states * nb_actions, nb_states) matrix for all actions.
+        """
+        from scipy.sparse import csr_matrix
+        P = csr_matrix(
+            (self.trans_proba, self.trans_target, self.trans_ptr),
+            shape=(self.nb_states * self.nb_actions, self.nb_states))
+        if action is None or self.nb_actions == 1:
+            return P
+        return P[action::self.nb_actions]  # type: ignore
+
+    def index_actions(self) -> None:
+        """Build the index of enabled actions: `enabled[s, a]` tells if the action
+        `a` is available from the state `s`, and the available actions of `s` are
+        `enabled_actions[enabled_ptr[s]:enabled_ptr[s+1]]`.
+        """
+        self.enabled = np.diff(self.trans_ptr).reshape(self.nb_states, self.nb_actions) > 0
+        self.enabled_ptr = np.zeros(self.nb_states + 1, dtype=np.int64)
+        np.cumsum(np.sum(self.enabled, axis=1), out=self.enabled_ptr[1:])
+        self.enabled_actions = np.nonzero(self.enabled)[1]
+
+    def index_samplers(self) -> None:
+        """Build the alias tables used to draw the successors in O(1) (Vose's
+        method): to draw from the row `r`, pick uniformly an entry `j` among the
+        row's entries, then keep `trans_target[j]` with probability
+        `alias_proba[j]`, or take `alias_target[j]` otherwise.
+
+        Each round pairs, in every row, the k-th entry below the mean with the
+        k-th entry above it, so all the rows are processed at once.
+        """
+        counts = np.diff(self.trans_ptr)
+        rows = np.repeat(np.arange(self.nb_states * self.nb_actions), counts)
+        scaled = self.trans_proba * counts[rows]
+        alias = np.arange(len(scaled))
+        self.alias_proba = np.ones(len(scaled))
+        active = np.arange(len(scaled))
+        while len(active):
+            small = scaled[active] < 1
+            small_entries, small_ranks = _ranks_in_rows(active[small], rows)
+            large_entries, large_ranks = _ranks_in_rows(active[~small], rows)
+            nb_small = np.bincount(rows[small_entries], minlength=len(counts))
+            nb_large = np.bincount(rows[large_entries], minlength=len(counts))
+            paired = np.minimum(nb_small, nb_large)
+            small_entries = small_entries[small_ranks < paired[rows[small_entries]]]
+            large_entries = large_entries[large_ranks < paired[rows[large_entries]]]
+            if not len(small_entries):
+                break
+            self.alias_proba[small_entries] = scaled[small_entries]
+            alias[small_entries] = large_entries
+            scaled[large_entries] -= 1 - scaled[small_entries]
+            done = np.zeros(len(scaled), dtype=bool)
+            done[small_entries] = True
+            active = active[~done[active]]
+        self.alias_target = self.trans_target[alias]
+
+    def index_graph(self) -> None:
+        """Build the predecessor lists of the graph of the MDP, whatever the
+        action: the states with a transition to `t` are
+        `pred_source[pred_ptr[t]:pred_ptr[t+1]]`. Also find the absorbing
+        states, whose transitions all loop on themselves.
+        """
+        sources = np.repeat(np.arange(self.nb_states * self.nb_actions),
+                            np.diff(self.trans_ptr)) // self.nb_actions
+        edges = np.unique(self.trans_target * self.nb_states + sources)
+        self.pred_source = edges % self.nb_states
+        self.pred_ptr = np.zeros(self.nb_states + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges // self.nb_states, minlength=self.nb_states),
+                  out=self.pred_ptr[1:])
+        leaving = sources[self.trans_target != sources]
+        self.absorbing = np.bincount(leaving, minlength=self.nb_states) == 0
+
+    def index_components(self) -> None:
+        """Find the strongly connected components of the graph of the MDP,
+        whatever the action: `component[s]` is the component of the state `s`.
+        The components are numbered in reverse topological order, a component
+        only leading to components with a lower number, so that they can be
+        solved one after the other.
+        They are only needed by some solvers, so they are computed on their
+        first use, see `component_groups`.
+        """
+        # the graph without duplicate edges, reversing the predecessor lists
+        order = np.argsort(self.pred_source, kind='stable')
+        succ_target = np.repeat(np.arange(self.nb_states), np.diff(self.pred_ptr))[order]
+        succ_ptr = np.zeros(self.nb_states + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.pred_source, minlength=self.nb_states), out=succ_ptr[1:])
+        if len(succ_target) <= self.TARJAN_LIMIT:
+            labels = _tarjan(succ_ptr.tolist(), succ_target)
+        else:
+            # the compiled search of scipy, slower to import but faster on large graphs
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import connected_components
+            graph = csr_matrix((np.ones(len(succ_target)), succ_target, succ_ptr),
+                               shape=(self.nb_states, self.nb_states))
+            _, labels = connected_components(graph, connection='strong')
+        labels = labels.astype(np.int64)
+        sources = labels[np.repeat(np.arange(self.nb_states), np.diff(succ_ptr))]
+        targets = labels[succ_target]
+        if np.any(targets > sources):
+            # scipy does not document the order of its numbering: sort the
+            # components by the length of the longest path to a component
+            # leading to no other one, peeling them level by level
+            nb_components = int(labels.max()) + 1
+            leaving = sources != targets
+            edges = np.unique(targets[leaving] * nb_components + sources[leaving])
+            pred_ptr = np.searchsorted(edges // nb_components, np.arange(nb_components + 1))
+            pred_source = edges % nb_components
+            remaining = np.bincount(pred_source, minlength=nb_components)
+            level = np.zeros(nb_components, dtype=np.int64)
+            frontier = np.flatnonzero(remaining == 0)
+            l = 0
+            while len(frontier):
+                level[frontier] = l
+                predecessors, counts = np.unique(
+                    pred_source[_ranges(pred_ptr[frontier], pred_ptr[frontier + 1])], return_counts=True)
+                remaining[predecessors] -= counts
+                frontier = predecessors[remaining[predecessors] == 0]
+                l += 1
+            rank = np.empty(nb_components, dtype=np.int64)
+            rank[np.argsort(level, kind='stable')] = np.arange(nb_components)
+            labels = rank[labels]
+        self.component = labels
+
+    def component_groups(self, states: np.ndarray, block: int = 1) -> list[np.ndarray]:
+        """Returns the positions in `states` of the states of each strongly
+        connected component, see `index_components`, from the components
+        leading to no other one. Consecutive components are grouped until they
+        hold `block` states, a group only leading to itself and to the
+        previous groups.
+
+        Args:
+            states (np.ndarray): The states, without duplicates.
+            block (int, optional): The number of states from which a group is
+                closed. Defaults to 1, a group per component.
+
+        Returns:
+            list[np.ndarray]: The positions of the states of each non-empty group.
+        """
+        if not hasattr(self, 'component'):
+            self.index_components()
+        if not len(states):
+            return []
+        component = self.component[states]
+        order = np.argsort(component, kind='stable')
+        sizes = np.bincount(component)
+        # a group gathers the components starting in the same range of `block` states
+        group = (np.cumsum(sizes) - sizes) // block
+        bounds = np.flatnonzero(np.diff(group[component[order]])) + 1
+        return np.split(order, bounds)
+
+    def backward_reachable(self, targets: np.ndarray, avoid: np.ndarray | None = None) -> np.ndarray:
+        """Returns the states from which a path, whatever the actions, leads to
+        a target state, with a backward search over the predecessor lists.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+            avoid (np.ndarray, optional): The mask of the states the path may not go through.
+
+        Returns:
+            np.ndarray: The mask of the states which can reach a target state.
+        """
+        reached = targets.copy()
+        if avoid is not None:
+            reached |= avoid
+        frontier = np.flatnonzero(targets)
+        while len(frontier):
+            predecessors = self.pred_source[_ranges(self.pred_ptr[frontier],
+                                                    self.pred_ptr[frontier + 1])]
+            frontier = np.unique(predecessors[~reached[predecessors]])
+            reached[frontier] = True
+        if avoid is not None:
+            reached &= targets | ~avoid
+        return reached
+
+    def prob0(self, targets: np.ndarray) -> np.ndarray:
+        """Returns the states from which the target states are reached with
+        probability 0, whatever the actions: those with no path to them.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+
+        Returns:
+            np.ndarray: The mask of the states with probability 0.
+        """
+        return ~self.backward_reachable(targets)
+
+    def prob1(self, targets: np.ndarray, zero: np.ndarray | None = None) -> np.ndarray:
+        """Returns the states of a Markov Chain from which the target states are
+        reached with probability 1: those with no path to a state of
+        probability 0 avoiding the targets.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+            zero (np.ndarray, optional): The mask of the states with probability 0,
+                computed if not given.
+
+        Returns:
+            np.ndarray: The mask of the states with probability 1.
+        """
+        if zero is None:
+            zero = self.prob0(targets)
+        return ~self.backward_reachable(zero, avoid=targets)
+
+    def prob0_exists(self, targets: np.ndarray) -> np.ndarray:
+        """Returns the states from which some choice of the actions never
+        reaches the target states: the greatest set of non-target states
+        where each state has an action whose successors all stay in the set.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+
+        Returns:
+            np.ndarray: The mask of the states with minimal probability 0.
+        """
+        avoiding = ~targets
+        while True:
+            next_avoiding = avoiding & np.any(self.staying_actions(avoiding), axis=1)
+            if np.array_equal(next_avoiding, avoiding):
+                return avoiding
+            avoiding = next_avoiding
+
+    def prob1_exists(self, targets: np.ndarray, zero: np.ndarray | None = None) -> np.ndarray:
+        """Returns the states from which some choice of the actions reaches the
+        target states with probability 1: the greatest set of states from which
+        the targets can be reached through actions whose successors all stay in
+        the set. Each inner backward search goes through the transitions
+        into the states just reached.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+            zero (np.ndarray, optional): The mask of the states with maximal
+                probability 0, computed if not given.
+
+        Returns:
+            np.ndarray: The mask of the states with maximal probability 1.
+        """
+        if zero is None:
+            zero = self.prob0(targets)
+        # the (state, action) rows of the transitions, grouped by target state
+        rows = np.repeat(np.arange(self.nb_states * self.nb_actions), np.diff(self.trans_ptr))
+        order = np.argsort(self.trans_target, kind='stable')
+        rows_into = rows[order]
+        into_ptr = np.concatenate(([0], np.cumsum(np.bincount(self.trans_target, minlength=self.nb_states))))
+        ones = ~zero
+        while True:
+            staying = self.staying_actions(ones).ravel()
+            reached = targets.copy()
+            frontier = np.flatnonzero(targets)
+            while len(frontier):
+                candidates = rows_into[_ranges(into_ptr[frontier], into_ptr[frontier + 1])]
+                sources = candidates[staying[candidates]] // self.nb_actions
+                frontier = np.unique(sources[~reached[sources]])
+                reached[frontier] = True
+            if np.array_equal(reached, ones):
+                return ones
+            ones = reached
+
+    def staying_actions(self, states: np.ndarray) -> np.ndarray:
+        """Returns the enabled actions whose successors all are in a set of states.
+
+        Args:
+            states (np.ndarray): The mask of the set of states.
+
+        Returns:
+            np.ndarray: The (nb_states, nb_actions) mask of these actions.
+        """
+        rows = np.repeat(np.arange(self.nb_states * self.nb_actions), np.diff(self.trans_ptr))
+        leaving = np.bincount(rows[~states[self.trans_target]],
+                              minlength=self.nb_states * self.nb_actions) > 0
+        return self.enabled & ~leaving.reshape(self.nb_states, self.nb_actions)
+
+    def draw_pairs(self, states: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Draw uniformly an enabled action of each given state.
+
+        Args:
+            states (np.ndarray): The states to draw from.
+            rng (np.random.Generator): The random generator to use.
+
+        Returns:
+            np.ndarray: The index of the drawn (state, action) pairs in `enabled_actions`.
+        """
+        start = self.enabled_ptr[states]
+        count = self.enabled_ptr[states + 1] - start
+        return start + (rng.random(len(states)) * count).astype(np.int64)
+
+    def draw_steps(
+        self,
+        states: np.ndarray,
+        rng: np.random.Generator,
+        policy: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Draw one step from each given state, the action being given by the
+        policy or drawn uniformly among the available ones.
+
+        Args:
+            states (np.ndarray): The current states.
+            rng (np.random.Generator): The random generator to use.
+            policy (np.ndarray, optional): The action to use from each state.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The actions used, and the next states.
+        """
+        if policy is not None:
+            action = policy[states]
+        else:
+            action = self.enabled_actions[self.draw_pairs(states, rng)]
+        rows = states.astype(np.int64) * self.nb_actions + action
+        return action, self.draw_successors(rows, rng.random(len(states)))
+
+    def draw_successors(self, rows: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """Draw a successor for each given (state, action) row, with the alias tables.
+
+        Args:
+            rows (np.ndarray): The rows `s * nb_actions + a` to draw from.
+            uniforms (np.ndarray): One uniform number in [0, 1) per row.
+
+        Returns:
+            np.ndarray: The drawn target states.
+        """
+        start = self.trans_ptr[rows]
+        scaled = uniforms * (self.trans_ptr[rows + 1] - start)
+        entry = scaled.astype(np.int64)
+        j = start + entry
+        return np.where(scaled - entry < self.alias_proba[j],
+                        self.trans_target[j], self.alias_target[j])
+
+    def actions_from(self, current_state: int) -> np.ndarray:
         """Returns the list of actions available from a state.
 
         Args:
             current_state (int): The state we want to know which actions are available from.
 
         Returns:
-            list[int]: The list of indices of the available actions.
+            np.ndarray: The indices of the available actions.
         """
-        possible_actions = []
-        for action in range(self.nb_actions):
-            if np.sum(self.probas[current_state][action]):
-                possible_actions.append(action)
-        return possible_actions
+        return self.enabled_actions[
+            self.enabled_ptr[current_state]:self.enabled_ptr[current_state + 1]]
 
     def check_actions_coherence(self) -> None:
-        """Check that no state has transitions with and without actions
+        """Check that no state has transitions with and without actions, and
+        add a self-loop to the states without any transition.
 
         Raises:
-            Exception: _description_
-            Exception: _description_
+            Exception: raised if a state has transitions with and without actions.
         """
-        for s in range(self.nb_states):
-            possible_actions = self.actions_from(s)
-            if 0 in possible_actions and len(possible_actions) != 1:
-                raise Exception(
-                    f"The state {self.states_labels[s]} has transitions with "
-                    " AND without actions.")
-            if len(possible_actions) == 0:
-                print(f"Aucune action possible depuis {self.states_labels[s]}. "
-                      "Ajout d'une transition vers ce même état.")
-                self.probas[s, None, s] = 1
-
-    def build(self, initial_state_label: str | None = None) -> None:
+        sources, actions, _, _ = self.buffer.arrays()
+        enabled = np.zeros((self.nb_states, self.nb_actions), dtype=bool)
+        enabled[sources, actions] = True
+        nb_enabled = np.sum(enabled, axis=1)
+        mixed = np.flatnonzero(enabled[:, 0] & (nb_enabled != 1))
+        if len(mixed):
+            raise Exception(
+                f"The state {self.states_labels[mixed[0]]} has transitions with "
+                " AND without actions.")
+        stuck = np.flatnonzero(nb_enabled == 0)
+        for s in stuck:
+            print(f"Aucune action possible depuis {self.states_labels[s]}. "
+                  "Ajout d'une transition vers ce même état.")
+        self.buffer.extend(stuck, np.zeros_like(stuck), stuck, np.ones(len(stuck)))
+
+    def build(self, initial_state_label: str | None = None, verbose: int = 0) -> None:
         """Validate and build the MDP.
+        The time spent in each pass is stored in `build_times`.
+
+        Args:
+            initial_state_label (str, optional): The initial state of the MDP, by default the first one.
+            verbose (int, optional): The verbose level, 2 to print the build times.
+        """
+        self.build_times = {}
+        for name, step in (('coherence', self.check_actions_coherence),
+                           ('compile', self.compile_transitions),
+                           ('normalize', self.normalize),
+                           ('index', self.index_actions),
+                           ('samplers', self.index_samplers),
+                           ('graph', self.index_graph)):
+            start = perf_counter()
+            step()
+            self.build_times[name] = perf_counter() - start
+        self.set_initial_state(initial_state_label)
+        if verbose >= 2:
+            print("Build times: " + ", ".join(
+                f"{name} {duration * 1000:.1f} ms"
+                for name, duration in self.build_times.items()))
+
+    def set_initial_state(self, initial_state_label: str | None = None) -> None:
+        """Set the initial state of the MDP.
 
         Args:
             initial_state_label (str, optional): The initial state of the MDP, by default the first one.
         """
-        self.normalize()
-        self.check_actions_coherence()
         if initial_state_label is None:
             self.initial_state = 0
         else:
-            self.initial_state = self.states_id[initial_state_label]
+            self.initial_state = self.state_id(initial_state_label)
 
     def is_mc(self) -> bool:
         """Indicates if the model is a Markov Chain (MC) or a Markov Decision
@@ -144,17 +681,15 @@ class MDP:
             f"States: {list(zip(self.states_labels, self.rewards)) if any(self.rewards) else self.states_labels}",
             f"Actions: {self.actions_labels}",
             *[
-                (f"{state} [{action}] -> " if action else f"{state} -> ")
+                (f"{self.states_labels[s]} [{self.actions_labels[a]}] -> " if a
+                 else f"{self.states_labels[s]} -> ")
                 + str({
-                    s: w 
-                    for s, w in zip(
-                        self.states_labels,
-                        self.probas[self.states_id[state], self.actions_id[action]])
-                    if w
+                    self.states_labels[t]: w
+                    for t, w in zip(*self.successors(s, a))
                 })[1:-1]
-                for action in self.actions_labels
-                for state in self.states_labels
-                if np.any(self.probas[self.states_id[state], self.actions_id[action]])
+                for a in range(self.nb_actions)
+                for s in range(self.nb_states)
+                if len(self.successors(s, a)[0])
             ],
             f"Initial State: {self.states_labels[self.initial_state]}"
         ])
@@ -199,19 +734,252 @@ class MDP:
             if verbose >= 2:
                 print(f"\tAction : {self.actions_labels[action]}")
             # Tirage aléatoire de la transition
-            next_state = np.random.choice(
-                self.nb_states,
-                p=self.probas[current_state, action])
+            next_state = self.draw_successors(
+                np.array([current_state * self.nb_actions + action]), np.random.random(1))[0]
             path.append(next_state)
         if verbose >= 1:
             print(f"Final State: {self.states_labels[path[-1]]}")
         return path, action
-    
+
+    def simulate_batch(
+        self,
+        n_runs: int,
+        n_steps: int,
+        policy: np.ndarray | None = None,
+        initial: int | np.ndarray | None = None,
+        rng: np.random.Generator | None = None,
+        return_actions: bool = False
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """Runs many simulations of the MDP in lockstep.
+
+        Args:
+            n_runs (int): Number of simulations to run.
+            n_steps (int): Number of steps to run.
+            policy (np.ndarray, optional): The action to use from each state. By
+                default, an available action is chosen at random at each step.
+            initial (int | np.ndarray, optional): The state to start simulations
+                from, or one state per simulation. By default the initial state of the MDP.
+            rng (np.random.Generator, optional): The random generator to use.
+            return_actions (bool, optional): Also return the actions used.
+
+        Returns:
+            np.ndarray | tuple[np.ndarray, np.ndarray]: The (n_runs, n_steps+1)
+                matrix of visited states, and the (n_runs, n_steps) matrix of
+                the actions used if requested.
+        """
+        if initial is None:
+            initial = self.initial_state
+        if rng is None:
+            rng = np.random.default_rng()
+        paths = np.empty((n_runs, n_steps + 1), dtype=np.int32)
+        actions = np.empty((n_runs, n_steps), dtype=np.int32)
+        paths[:, 0] = initial
+        for step in range(n_steps):
+            actions[:, step], paths[:, step + 1] = self.draw_steps(paths[:, step], rng, policy)
+        if return_actions:
+            return paths, actions
+        return paths
+
+    def simulate_until(
+        self,
+        n_runs: int,
+        n_steps: int,
+        stop: np.ndarray,
+        rng: np.random.Generator | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Runs many simulations of the MDP from its initial state in lockstep,
+        each one ending as soon as it enters a stop state, an available action
+        being chosen at random at each step. Only the running simulations are
+        advanced, so the cost follows the time to stop rather than the number of steps.
+
+        Args:
+            n_runs (int): Number of simulations to run.
+            n_steps (int): Max number of steps to run. Use n=0 for infinity,
+                when a stop state can be reached from every other state.
+            stop (np.ndarray): The mask of the states ending a simulation.
+            rng (np.random.Generator, optional): The random generator to use.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The last state of each simulation, and
+                its number of steps.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        states = np.full(n_runs, self.initial_state, dtype=np.int32)
+        lengths = np.zeros(n_runs, dtype=np.int32)
+        running = np.flatnonzero(~stop[states])
+        step = 0
+        while len(running) and (n_steps <= 0 or step < n_steps):
+            step += 1
+            _, current = self.draw_steps(states[running], rng)
+            states[running] = current
+            lengths[running] += 1
+            running = running[~stop[current]]
+        return states, lengths
+
+    def reachability_stops(self, terminal_state: int) -> np.ndarray:
+        """Returns the states where a simulation can stop when estimating the
+        probability to reach a state: the state itself, the absorbing states
+        and the states from which it cannot be reached anymore.
+
+        Args:
+            terminal_state (int): The state to reach.
+
+        Returns:
+            np.ndarray: The mask of the stop states.
+        """
+        target = np.zeros(self.nb_states, dtype=bool)
+        target[terminal_state] = True
+        return target | self.absorbing | ~self.backward_reachable(target)
+
+    def solve_linear(
+        self,
+        A: 'csr_matrix',
+        b: np.ndarray,
+        solver: str = 'auto',
+        tol: float = 1e-10
+    ) -> np.ndarray:
+        """Solve the linear system x = Ax + b of the model checking algorithms.
+        By default, the systems with few nonzeros per row are solved by a
+        sparse factorization up to `SPARSE_SOLVE_LIMIT` unknowns, the other
+        small ones by a dense factorization, and the rest by BiCGSTAB, as the
+        factorizations of the sparse matrices of the MDPs fill in quickly.
+
+        Args:
+            A (csr_matrix): The square sub-stochastic matrix of the system.
+            b (np.ndarray): The constant vector of the system.
+            solver (str, optional): One of `SOLVERS`. Defaults to 'auto'.
+            tol (float, optional): The tolerance of the iterative solvers: the
+                relative residual for 'gmres' and 'bicgstab', the difference
+                between two iterates for 'jacobi' and 'gauss-seidel'. Defaults to 1e-10.
+
+        Raises:
+            RuntimeError: raised if an iterative solver does not converge, or if
+                the matrix of a sparse factorization is singular.
+            np.linalg.LinAlgError: raised if the matrix of a dense factorization is singular.
+
+        Returns:
+            np.ndarray: The solution x.
+        """
+        from inspect import signature
+
+        from scipy.sparse import identity, tril, triu
+        from scipy.sparse.linalg import bicgstab, gmres, spsolve_triangular, splu
+        assert solver in self.SOLVERS, f"Unknown solver {solver}."
+        n = len(b)
+        if n == 0:
+            return np.zeros(0)
+        if solver == 'auto':
+            if n <= self.SPARSE_SOLVE_LIMIT and A.nnz <= self.SPARSE_ROW_LIMIT * n:
+                solver = 'splu'
+            elif n <= self.DENSE_SOLVE_LIMIT:
+                solver = 'dense'
+            else:
+                solver = 'bicgstab'
+        if solver == 'dense':
+            return np.linalg.solve(np.eye(n) - A.toarray(), b)
+        M = (identity(n, format='csr') - A).tocsr()
+        if solver == 'splu':
+            return splu(M.tocsc()).solve(b)
+        if solver in ('gmres', 'bicgstab'):
+            # the relative tolerance is named `rtol` since scipy 1.12, `tol` before
+            tolerance = 'rtol' if 'rtol' in signature(gmres).parameters else 'tol'
+            # BiCGSTAB is faster but may break down, then GMRES takes over
+            for method in ([bicgstab] if solver == 'bicgstab' else []) + [gmres]:
+                x, info = method(M, b, atol=0., maxiter=self.SOLVER_ITER_MAX, **{tolerance: tol})
+                if info == 0:
+                    return x
+            raise RuntimeError(f"The solver {solver} did not converge.")
+        # splitting methods: M = L - U, iterate L x' = U x + b
+        if solver == 'jacobi':
+            diagonal = M.diagonal()
+            U = -M
+            U.setdiag(0)
+            step = lambda x: (U @ x + b) / diagonal
+        else:
+            L = tril(M, format='csr')
+            U = -triu(M, k=1, format='csr')
+            step = lambda x: spsolve_triangular(L, U @ x + b, lower=True)
+        x = np.zeros(n)
+        for _ in range(self.SOLVER_ITER_MAX):
+            x, previous = step(x), x
+            if np.max(np.abs(x - previous)) <= tol:
+                return x
+        raise RuntimeError(f"The solver {solver} did not converge.")
+
+    def solve_linear_by_components(
+        self,
+        states: np.ndarray,
+        A: 'csr_matrix',
+        b: np.ndarray,
+        solver: str = 'auto',
+        tol: float = 1e-10
+    ) -> np.ndarray:
+        """Solve the linear system x = Ax + b over some states, one strongly
+        connected component after the other, a component without cycle being
+        solved by a single product. The small consecutive components are solved
+        together, by groups of `COMPONENT_BLOCK` unknowns, as a solve per
+        component would be slower than a global solve on long chains of them.
+
+        Args:
+            states (np.ndarray): The state of each unknown.
+            A (csr_matrix): The square sub-stochastic matrix of the system.
+            b (np.ndarray): The constant vector of the system.
+            solver (str, optional): The solver of the groups, see `solve_linear`.
+            tol (float, optional): The tolerance of the iterative solvers.
+
+        Returns:
+            np.ndarray: The solution x.
+        """
+        x = np.zeros(len(b))
+        for group in self.component_groups(states, self.COMPONENT_BLOCK):
+            # the unknowns of the next groups are still 0, and not used anyway
+            rows = A[group]
+            rhs = b[group] + rows @ x
+            block = rows[:, group]
+            x[group] = self.solve_linear(block, rhs, solver, tol) if block.nnz else rhs
+        return x
+
+    def reachability_system(
+        self,
+        terminal_state_label: str,
+        bounded: bool
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, 'csr_matrix', np.ndarray]:
+        """Returns the linear system of the probability to reach a state in a
+        Markov Chain: the probabilities y of the states of S, which are neither
+        in S0 nor in S1, are given by y = Ay + b.
+
+        Args:
+            terminal_state_label (str): The state to reach.
+            bounded (bool): If the number of steps is bounded, then S1 only
+                holds the terminal state.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, csr_matrix, np.ndarray]:
+                The masks of S0 and S1, the sorted states of S, A and b.
+        """
+        # reduce the probability matrix to 2 dim
+        assert self.is_mc(), "The model is not a Markov Chain."
+        P = self.transition_matrix(0)
+        # build the S0 and S1 masks with backward searches in the graph
+        target = np.zeros(self.nb_states, dtype=bool)
+        target[self.state_id(terminal_state_label)] = True
+        S0 = self.prob0(target)
+        S1 = target if bounded else self.prob1(target, S0)
+        # calcul de S?
+        S = np.flatnonzero(~(S0 | S1))
+        # definition de A et B
+        A = P[S][:, S]
+        b = np.asarray(P[S][:, S1].sum(axis=1)).ravel()
+        return S0, S1, S, A, b
+
     def model_checking_mc(
         self,
         terminal_state_label: str,
         n_steps: int,
-        verbose: int
+        verbose: int,
+        solver: str = 'auto',
+        tol: float = 1e-10
     ) -> float:
         """Model checking algorithm for Markov Chains only.
         Compute the probability to reach a state from the initial state.
@@ -220,68 +988,89 @@ class MDP:
             terminal_state_label (str): The state we want to access.
             n_steps (int): Max number of steps allowed. Use n=0 for infinity.
             verbose (int): The verbose level.
+            solver (str, optional): The solver of the infinite case, see `solve_linear`.
+            tol (float, optional): The tolerance of the iterative solvers.
 
         Returns:
             float: The probability to access the state, ie P(I |= <>(<=n) T).
         """
         if verbose >= 1:
             print(f"Compute for {n_steps if n_steps > 0 else 'infinite'} steps")
-        # reduce the probability matrix to 2 dim
-        assert self.is_mc(), "The model is not a Markov Chain."
-        P = self.probas[:, 0, :]
-        # build the S1 set
-        S1 = { self.states_id[terminal_state_label] }
-        if not n_steps > 0:  # do not build S1 for finite number of steps
-            s = 0
-            while s < self.nb_states:
-                if (not s in S1 and
-                    all([P[s, t]==0 for t in range(self.nb_states) if not t in S1])
-                ):
-                    S1.add(s); s = -1
-                s += 1
-        # build the S0 set
-        S0 = set()
-        s = 0
-        while s < self.nb_states:
-            if (not s in S0 and
-                not s in S1 and (
-                P[s,s] == 1 or
-                all([P[s, t]==0 for t in range(self.nb_states) if not t in S0 and t != s])
-            )):
-               S0.add(s); s = -1
-            s += 1
-        # calcul de S?
-        S = set(range(self.nb_states))
-        S = S.difference(S0, S1)
-        # definition de A et B
-        A = P[np.ix_(list(S), list(S))]
-        b = np.array([np.sum(P[s, list(S1)]) for s in S])
+        S0, S1, S, A, b = self.reachability_system(terminal_state_label, n_steps > 0)
         # cas infini : on résout y = Ay + b
         if n_steps > 0:
             y = np.zeros(len(S))
             for _ in range(n_steps):
                 y = A.dot(y) + b
         else:
-            y = np.linalg.solve(np.eye(len(S)) - A, b)
+            y = self.solve_linear_by_components(S, A, b, solver, tol)
         # retourne le résultat
-        if self.initial_state in S1:
+        if S1[self.initial_state]:
             if verbose >= 1:
                 print(f"P({self.states_labels[self.initial_state]} |= <> {terminal_state_label}) = 1")
             return 1
-        if self.initial_state in S0:
+        if S0[self.initial_state]:
             if verbose >= 1:
                 print(f"P({self.states_labels[self.initial_state]} |= <> {terminal_state_label}) = 0")
             return 0
-        res = y[list(S).index(self.initial_state)]
+        res = y[np.searchsorted(S, self.initial_state)]
         if verbose >= 1:
             print(f"P({self.states_labels[self.initial_state]} |= <> {terminal_state_label}) = {res}")
         return res
 
+    def model_checking_mc_curve(
+        self,
+        terminal_state_label: str,
+        n_steps: int,
+        verbose: int,
+        tol: float = 0,
+        output: str | None = None
+    ) -> np.ndarray:
+        """Model checking algorithm for Markov Chains only, which computes the
+        probability to reach a state from the initial state for every bounded
+        number of steps at once, with a single backward iteration.
+
+        Args:
+            terminal_state_label (str): The state we want to access.
+            n_steps (int): Max number of steps. Use n=0 to stop only with `tol`.
+            verbose (int): The verbose level.
+            tol (float, optional): Stop once the probabilities of all the states
+                change by less than `tol` in one step. Defaults to 0, never stop early.
+            output (str, optional): A file to write the curve in while it is computed.
+
+        Returns:
+            np.ndarray: The probabilities P(I |= <>(<=k) T) for k = 0, 1, ...
+        """
+        assert n_steps > 0 or tol > 0, "The number of steps or the tolerance must be positive."
+        S0, S1, S, A, b = self.reachability_system(terminal_state_label, True)
+        i = self.initial_state
+        index = np.searchsorted(S, i)
+        curve = [float(S1[i])]
+        y = np.zeros(len(S))
+        with open(output, 'w') if output is not None else nullcontext() as file:
+            while n_steps <= 0 or len(curve) <= n_steps:
+                if file is not None:
+                    file.write(f"{len(curve) - 1}\t{curve[-1]}\n")
+                if verbose >= 2:
+                    print(f"P({self.states_labels[i]} |= <>(<={len(curve) - 1}) {terminal_state_label}) = {curve[-1]}")
+                y, previous = A.dot(y) + b, y
+                curve.append(float(S1[i]) if S0[i] or S1[i] else y[index])
+                if tol > 0 and np.max(np.abs(y - previous), initial=0) < tol:
+                    break
+            if file is not None:
+                file.write(f"{len(curve) - 1}\t{curve[-1]}\n")
+        if verbose >= 1:
+            print(f"Computed for {len(curve) - 1} steps")
+            print(f"P({self.states_labels[i]} |= <>(<={len(curve) - 1}) {terminal_state_label}) = {curve[-1]}")
+        return np.array(curve)
+
     def model_checking_mc_rewards(
         self,
         n_steps: int,
         gamma: float,
-        verbose: int
+        verbose: int,
+        solver: str = 'auto',
+        tol: float = 1e-10
     ) -> list[float]:
         """Model checking algorithm for Markov Chains only, which computes the
         rewards associated for each terminal state.
@@ -290,6 +1079,8 @@ class MDP:
             n_steps (int): Max number of steps allowed. Use n=0 for infinity.
             gamma (float): The reduction factor to ensure convergence.
             verbose (int): The verbose level.
+            solver (str, optional): The solver of the infinite case, see `solve_linear`.
+            tol (float, optional): The tolerance of the iterative solvers.
 
         Returns:
             list[float]: List of gains for each state.
@@ -298,7 +1089,7 @@ class MDP:
             print(f"Compute for {n_steps if n_steps > 0 else 'infinite'} steps")
         # reduce the probability matrix to 2 dim
         assert self.is_mc(), "The model is not a Markov Chain."
-        P = self.probas[:, 0, :]
+        P = self.transition_matrix(0)
         # 
         r = np.array(self.rewards)
         # cas infini : on résout y = Ay + b
@@ -308,8 +1099,8 @@ class MDP:
                 y = gamma * P.dot(y) + r
         else:
             try:
-                y = np.linalg.solve(np.eye(self.nb_states) - gamma*P, r)
-            except Exception:
+                y = self.solve_linear_by_components(np.arange(self.nb_states), gamma * P, r, solver, tol)
+            except (np.linalg.LinAlgError, RuntimeError):
                 raise Exception("Model diverges")
         # retourne le résultat
         if verbose >= 1:
@@ -331,49 +1122,197 @@ class MDP:
         Returns:
             list[float]: The probabilities to access the terminal state for each state as initial state.
         """
-        terminal_state = self.states_id[terminal_state_label]
-        # create the matrix A
-        A = np.zeros((self.nb_states * (self.nb_actions + 2), self.nb_states))
-        for s in range(self.nb_states):
-            if s != terminal_state:
-                for a in range(self.nb_actions):
-                    for t in range(self.nb_states):
-                        i, j = s * (self.nb_actions + 2) + a, t
-                        if t == s:
-                            A[i, j] = 1 - self.probas[s, a, t]
-                        else:
-                            A[i, j] = - self.probas[s, a, t]
-                A[s * (self.nb_actions + 2) + self.nb_actions, s] = 1
-                A[s * (self.nb_actions + 2) + self.nb_actions + 1, s] = -1
-        # create matrix b
-        b = np.zeros(self.nb_states * (self.nb_actions + 2))
-        for s in range(self.nb_states):
-            if s != terminal_state:
-                for a in range(self.nb_actions):
-                    b[s * (self.nb_actions + 2) + a] = self.probas[s, a ,terminal_state]
-                b[s * (self.nb_actions + 2) + self.nb_actions] = 0
-                b[s * (self.nb_actions + 2) + self.nb_actions + 1] = -1
-        # Solving A.x <= b
-        result_max = linprog(np.ones(self.nb_states), A_ub=-A, b_ub=-b)
+        from scipy.optimize import linprog
+        from scipy.sparse import csr_matrix
+        terminal_state = self.state_id(terminal_state_label)
+        target = np.zeros(self.nb_states, dtype=bool)
+        target[terminal_state] = True
+        zero = self.prob0(target)
+        # one row x_s >= sum_t P(s, a, t) x_t per enabled action of the other states
+        rows = np.flatnonzero((self.enabled & ~(target | zero)[:, None]).ravel())
+        sources = rows // self.nb_actions
+        A = self.transition_matrix()[rows] - csr_matrix(
+            (np.ones(len(rows)), (np.arange(len(rows)), sources)),
+            shape=(len(rows), self.nb_states))
+        # the probabilities of the target and of the states of probability 0 are fixed
+        bounds = np.zeros((self.nb_states, 2))
+        bounds[~zero, 1] = 1
+        bounds[target, 0] = 1
+        # Solving A.x <= 0
+        result_max = linprog(np.ones(self.nb_states), A_ub=A, b_ub=np.zeros(len(rows)),
+                             bounds=bounds, method='highs')
         assert result_max['success'], "The algorithme did not converge or didn't find any solution for the MAX"
         x_max = result_max['x']
-        x_max[terminal_state] = 1
         if verbose >= 1:
             print(f"A solution was found with maximal probabilities for each starting state:")
             print(x_max)
         return x_max
 
+    def model_checking_mdp_iterative(
+        self,
+        terminal_state_label: str,
+        objective: str,
+        engine: str,
+        verbose: int,
+        tol: float = 1e-10,
+        iter_max: int = 10_000,
+        solver: str = 'auto'
+    ) -> tuple[np.ndarray, dict[str, str]]:
+        """Compute the maximal or minimal probabilities to reach a state in a
+        MDP, and a scheduler achieving them, by value or policy iteration.
+        The states of probability 0, and for value iteration the states of
+        maximal probability 1, are found first by graph searches. A warning is
+        emitted if value iteration stops on `iter_max` before converging.
+
+        Args:
+            terminal_state_label (str): The state to reach.
+            objective (str): 'max' or 'min'.
+            engine (str): 'vi' for value iteration, 'pi' for policy iteration.
+            verbose (int): The verbose level.
+            tol (float, optional): Value iteration stops once the probabilities
+                change by less than `tol`, policy iteration only changes the
+                action of a state if it improves its value by more than `tol`.
+                Defaults to 1e-10.
+            iter_max (int, optional): Max number of iterations. Defaults to 10.000.
+            solver (str, optional): The solver of the policy evaluations, see `solve_linear`.
+
+        Returns:
+            tuple[np.ndarray, dict[str, str]]: The optimal probability to reach
+                the terminal state from each state, and the action to use from each state.
+        """
+        assert objective in ('max', 'min'), f"Unknown objective {objective}."
+        assert engine in ('vi', 'pi'), f"Unknown engine {engine}."
+        target = np.zeros(self.nb_states, dtype=bool)
+        target[self.state_id(terminal_state_label)] = True
+        zero = self.prob0(target) if objective == 'max' else self.prob0_exists(target)
+        P = self.transition_matrix()
+        best, fill = (np.argmax, -np.inf) if objective == 'max' else (np.argmin, np.inf)
+        x = target.astype(float)
+
+        def backup(x: np.ndarray) -> np.ndarray:
+            """Returns the (nb_states, nb_actions) values of the actions."""
+            Q = (P @ x).reshape(self.nb_states, self.nb_actions)
+            Q[~self.enabled] = fill
+            return Q
+
+        states = np.arange(self.nb_states)
+        if engine == 'vi':
+            # value iteration only converges in the limit toward 1
+            one = self.prob1_exists(target, zero) if objective == 'max' else target
+            x[one] = 1
+            # local value iterations, one group of components after the other
+            unknown = np.flatnonzero(~(one | zero))
+            i = 0
+            unconverged = 0
+            for group in self.component_groups(unknown, self.COMPONENT_BLOCK):
+                members = unknown[group]
+                rows = P[(members[:, None] * self.nb_actions + np.arange(self.nb_actions)).ravel()]
+                disabled = ~self.enabled[members]
+                cyclic = rows[:, members].nnz > 0
+                for _ in range(iter_max if cyclic else 1):
+                    Q = (rows @ x).reshape(len(members), self.nb_actions)
+                    Q[disabled] = fill
+                    x_group = Q[np.arange(len(members)), best(Q, axis=1)]
+                    delta = np.max(np.abs(x_group - x[members]))
+                    x[members] = x_group
+                    i += 1
+                    if delta < tol:
+                        break
+                else:
+                    unconverged += cyclic
+            if unconverged:
+                warnings.warn(f"Value iteration stopped after {iter_max} iterations in {unconverged} "
+                              f"groups of components without reaching the tolerance {tol}.",
+                              RuntimeWarning)
+            policy = best(backup(x), axis=1)
+            if objective == 'max':
+                policy = self.progressing_policy(target | zero, backup(x) >= x[:, None] - tol, policy)
+        else:
+            # every state with a positive probability gets closer to the target
+            policy = self.progressing_policy(target | zero, self.enabled,
+                                             np.argmax(self.enabled, axis=1))
+            i = 0
+            for i in range(1, iter_max + 1):
+                # policy evaluation on the Markov Chain of the policy
+                P_policy = P[states * self.nb_actions + policy]
+                x = np.zeros(self.nb_states)
+                x[target] = 1
+                S = np.flatnonzero(_reaching(P_policy, target) & ~target & ~zero)
+                b = np.asarray(P_policy[S][:, target].sum(axis=1)).ravel()
+                x[S] = self.solve_linear(P_policy[S][:, S], b, solver, tol)
+                # policy improvement, keeping the current action on ties
+                Q = backup(x)
+                improved = best(Q, axis=1)
+                keep = np.abs(Q[states, improved] - Q[states, policy]) <= tol
+                if np.all(keep | target | zero):
+                    break
+                policy = np.where(keep | target | zero, policy, improved)
+        if objective == 'min':
+            # stay away from the target from the states of probability 0
+            policy[zero] = np.argmax(self.staying_actions(zero)[zero], axis=1)
+        if verbose >= 1:
+            print(f"Computed in {i} steps.")
+        strat = {label: self.actions_labels[policy[s]] for s, label in enumerate(self.states_labels)}
+        if verbose >= 1:
+            print(f"A solution was found with {'maximal' if objective == 'max' else 'minimal'} "
+                  "probabilities for each starting state:")
+            print(x)
+            print("Strat = ", strat)
+        return x, strat
+
+    def progressing_policy(
+        self,
+        targets: np.ndarray,
+        allowed: np.ndarray,
+        default: np.ndarray
+    ) -> np.ndarray:
+        """Returns a policy where each state which can reach the target states
+        through the allowed actions uses one of them leading closer to the
+        targets, so that the policy cannot loop away from them forever.
+
+        Args:
+            targets (np.ndarray): The mask of the target states.
+            allowed (np.ndarray): The (nb_states, nb_actions) mask of the allowed actions.
+            default (np.ndarray): The action of the other states.
+
+        Returns:
+            np.ndarray: The action to use from each state.
+        """
+        policy = default.copy()
+        rows = np.repeat(np.arange(self.nb_states * self.nb_actions), np.diff(self.trans_ptr))
+        allowed = (allowed & self.enabled).ravel()
+        done = targets.copy()
+        while True:
+            # allowed actions of the remaining states with a successor already done
+            progress = np.zeros(self.nb_states * self.nb_actions, dtype=bool)
+            progress[rows[done[self.trans_target]]] = True
+            progress = (progress & allowed).reshape(self.nb_states, self.nb_actions)
+            progress[done] = False
+            states = np.flatnonzero(np.any(progress, axis=1))
+            if not len(states):
+                return policy
+            policy[states] = np.argmax(progress[states], axis=1)
+            done[states] = True
+
     def smc_mc_quantitatif(
         self,
         terminal_state_label: str,
         n_steps: int,
         eps: float,
         delta: float,
-        verbose: int
+        verbose: int,
+        workers: int = 1,
+        seed: int | None = None
     ) -> float:
         """
         Statistical Model Checking: computes an approximation of P(I |= <>(<=n) T).
         This method uses the Monte-Carlo algorithm, and works only for Markov Chains.
+        The runs are drawn by blocks, each one from its own random stream, so
+        that the result only depends on the seed, whatever the number of workers.
+        The size of the blocks only depends on the number of runs N: N is split
+        into at most `SMC_BLOCKS` blocks of at least `SMC_MIN_BLOCK` runs, so
+        that the 9223 runs of the default eps and delta already give 10 blocks
+        to the workers.
 
         Args:
             terminal_state_label (str): The state T to reach.
@@ -381,25 +1320,65 @@ class MDP:
             eps (float): The precision coefficient.
             delta (float): The error rate coefficient.
             verbose (int): The verbose level.
+            workers (int, optional): The number of processes drawing the runs. Defaults to 1.
+            seed (int, optional): The seed of the random streams.
 
         Returns:
             float: Returns an estimation of the probability.
         """
         assert self.is_mc(), """The model is not a Markov Chain."""
-        terminal_state = self.states_id[terminal_state_label]
+        terminal_state = self.state_id(terminal_state_label)
         N = int(np.ceil((np.log(2) - np.log(delta)) / (4*eps**2)))
         if verbose >= 1:
             print(f"N = {N}")
-        count = 0
-        for _ in range(N):
-            path, _ = self.simulate(n_steps, 'random', verbose-1)
-            if terminal_state in path:
-                count += 1
+        stop = self.reachability_stops(terminal_state)
+        block = max(self.SMC_MIN_BLOCK, -(-N // self.SMC_BLOCKS))
+        streams = np.random.SeedSequence(seed).spawn(-(-N // block))
+        with self.worker_pool(min(workers, len(streams))) as pool:
+            results = self.map_blocks(_count_hits, [
+                (min(block, N - start), n_steps, stop, terminal_state, stream)
+                for start, stream in zip(range(0, N, block), streams)
+            ], pool)
+        count = sum(hits for hits, _ in results)
         p = count / N
+        if verbose >= 2:
+            print(f"Mean length of the simulations: {sum(steps for _, steps in results) / N:.2f} steps")
         if verbose >= 1:
             print(f"P({self.states_labels[self.initial_state]} |= <>(<={n_steps}) {terminal_state_label}) ≈ {p}")
         return p
 
+    def worker_pool(self, workers: int):
+        """Returns a pool of processes for `map_blocks`, to be used as a context
+        manager, or an empty context standing for no pool with a single worker.
+        The workers receive the MDP once, when they start (for free with the
+        fork start method), not with each block.
+
+        Args:
+            workers (int): The number of processes.
+        """
+        if workers <= 1:
+            return nullcontext()
+        import multiprocessing
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        return context.Pool(workers, initializer=_init_worker, initargs=(self,))
+
+    def map_blocks(self, task, blocks: list[tuple], pool=None) -> list:
+        """Run `task(mdp, *block)` for each block, in a pool of processes if one
+        is given, see `worker_pool`.
+
+        Args:
+            task: A module-level function taking the MDP and the block arguments.
+            blocks (list[tuple]): The arguments of each call.
+            pool (optional): The pool of processes. Defaults to None, in process.
+
+        Returns:
+            list: The results of the calls, in the order of the blocks.
+        """
+        if pool is None or len(blocks) <= 1:
+            return [task(self, *block) for block in blocks]
+        return pool.starmap(_run_in_worker, [(task, *block) for block in blocks])
+
     def smc_mc_qualitatif(
         self,
         terminal_state_label: str,
@@ -409,12 +1388,18 @@ class MDP:
         eps: float,
         theta: float,
         iter_max: int,
-        verbose: int
+        verbose: int,
+        workers: int = 1,
+        seed: int | None = None,
+        block_size: int = 1000
     ) -> bool | None:
         """
         Statiscal Model Checking for MDC.
         Check if the probability to reach a state in a MC is greater than
         theta, with epsilon-confidence. Uses the SPRT algorithm.
+        The runs are drawn by blocks, each one from its own random stream, and
+        the test is evaluated on a whole block at once, stopping at the same
+        run as if they were tested one by one.
 
         Args:
             terminal_state_label (str): The state T to reach.
@@ -425,24 +1410,40 @@ class MDP:
             theta (float): The upper born to test.
             iter_max (int): Max number of iteration.
             verbose (int): The verbose level.
+            workers (int, optional): The number of processes drawing the blocks. Defaults to 1.
+            seed (int, optional): The seed of the random streams.
+            block_size (int, optional): The number of runs of a block. Defaults to 1000.
 
         Returns:
             bool | None: True if estimation greater than theta, False if lesser than theta, None if uncertain.
         """
         assert self.is_mc(), "The model is not a Markov Chain."
-        terminal_state = self.states_id[terminal_state_label]
+        terminal_state = self.state_id(terminal_state_label)
         logA, logB = np.log(((1 - beta) / alpha, beta / (1 - alpha)))
         gamma1, gamma0 = theta - eps, theta + eps
+        log_success = np.log(gamma1) - np.log(gamma0)
+        log_failure = np.log(1 - gamma1) - np.log(1 - gamma0)
         logRm = (logA + logB) / 2
         dm = 0
         m = 0
-        while logB < logRm and logRm < logA and m < iter_max:
-            path, _ = self.simulate(n_steps, 'random', verbose-1)
-            if path[-1] == terminal_state:
-                dm += 1
-            logRm = (dm * (np.log(gamma1) - np.log(gamma0)) +
-                     (m - dm) * (np.log(1 - gamma1) - np.log(1 - gamma0)))
-            m += 1
+        stop = self.reachability_stops(terminal_state)
+        streams = np.random.SeedSequence(seed)
+        # the pool is started once, the test usually stops within a few rounds
+        with self.worker_pool(workers) as pool:
+            while logB < logRm and logRm < logA and m < iter_max:
+                # one block per worker
+                sizes = [min(block_size, iter_max - start)
+                         for start in range(m, min(iter_max, m + block_size * max(1, workers)), block_size)]
+                hits = np.concatenate(self.map_blocks(_draw_hits, [
+                    (size, n_steps, stop, terminal_state, stream)
+                    for size, stream in zip(sizes, streams.spawn(len(sizes)))
+                ], pool))
+                # value of the ratio after each run, the i-th run being the m-th overall
+                d = dm + np.cumsum(hits)
+                logR = d * log_success + (m + np.arange(len(hits)) - d) * log_failure
+                decided = np.flatnonzero((logR <= logB) | (logR >= logA))
+                last = decided[0] if len(decided) else len(hits) - 1
+                logRm, dm, m = logR[last], d[last], m + last + 1
         if logRm >= logA:
             if verbose >= 1:
                 print(f"P(M |= <>(≤ {n_steps}) {terminal_state_label}) ≤ {theta} (with ⍺={alpha:.2%} for confidence)")
@@ -460,49 +1461,212 @@ class MDP:
         gamma: float,
         epsilon: float,
         iter_max: int,
-        verbose: int
+        verbose: int,
+        variant: str = 'jacobi',
+        norm: str = 'l2'
     ) -> tuple[list[float], dict[str, str]]:
         """Reinforcement Learning with Value Iterations algorithm.
         Compute the best positional strategy to maximize rewards.
+        The variants differ by the order of the updates:
+        - 'jacobi' updates all the states at once from the previous values,
+        - 'gauss-seidel' updates the states one by one, in place,
+        - 'topological' solves the strongly connected components one after
+          the other, each one after the components it leads to,
+        - 'prioritized' updates first the states with the largest Bellman
+          residual, and stops once all of them are lower than epsilon: it
+          ignores `norm` and always stops on the sup norm of the residuals.
 
         Args:
             gamma (float): The convergence factor.
             epsilon (float): The precision factor.
             iter_max (int): Max number of iterations.
             verbose (int): The verbose level.
+            variant (str, optional): One of `VI_VARIANTS`. Defaults to 'jacobi'.
+            norm (str, optional): The norm of the change of the values stopping
+                the sweeps, 'l2' or 'sup', not used by 'prioritized'. Defaults to 'l2'.
 
         Returns:
             tuple[list[float], dict[str, str]]: last Vn vector and the strategy found.
         """
+        assert variant in self.VI_VARIANTS, f"Unknown variant {variant}."
+        assert norm in ('l2', 'sup'), f"Unknown norm {norm}."
         if verbose >= 1:
             print("Begin optimization...")
-        Vprev = np.inf * np.ones(self.nb_states)
-        Vnext = np.zeros(self.nb_states)
-        i = 0
-        while np.linalg.norm(Vnext - Vprev) >= epsilon and i < iter_max:
-            Vprev = Vnext.copy()
-            for sid in range(self.nb_states):
-                Vnext[sid] = np.max([
-                    self.rewards[sid] + gamma * np.sum(self.probas[sid,a,:] * Vprev)
-                    for a in self.actions_from(sid)
-                ])
-            i += 1
+        start = perf_counter()
+        P = self.transition_matrix()
+        r = np.array(self.rewards, dtype=float)
+        distance = np.linalg.norm if norm == 'l2' else lambda x: np.max(np.abs(x), initial=0)
+
+        def backup(V: np.ndarray) -> np.ndarray:
+            """Returns the (nb_states, nb_actions) values of the enabled actions,
+            -inf for the others."""
+            Q = r[:, None] + gamma * (P @ V).reshape(self.nb_states, self.nb_actions)
+            Q[~self.enabled] = -np.inf
+            return Q
+
+        if variant == 'jacobi':
+            Vprev = np.inf * np.ones(self.nb_states)
+            Vnext = np.zeros(self.nb_states)
+            i = 0
+            while distance(Vnext - Vprev) >= epsilon and i < iter_max:
+                Vprev = Vnext
+                Vnext = np.max(backup(Vprev), axis=1)
+                i += 1
+            backups = i * self.nb_states
+        else:
+            Vprev, backups = self.value_iteration_in_place(gamma, epsilon, iter_max, variant, distance)
+            i = -(-backups // self.nb_states)
         if verbose >= 1:
-            print(f"Computed in {i} steps.")
+            print(f"Computed in {i} steps ({backups} backups, {perf_counter() - start:.3f} s).")
             print("Compute strategy...")
-        strat = {}
-        for sl, sid in self.states_id.items():
-            possible_actions = self.actions_from(sid)
-            strat[sl] = self.actions_labels[possible_actions[np.argmax([
-                self.rewards[sid] + gamma * np.sum(self.probas[sid,a,:] * Vprev)
-                for a in possible_actions
-            ])]]
+        best = np.argmax(backup(Vprev), axis=1)
+        strat = {sl: self.actions_labels[best[sid]] for sl, sid in self.states_id.items()}
         # affichage
         if verbose >= 1:
             print("Vn = ", [f"{x:.2f}" for x in Vprev])
             print("Strat = ", strat)
         return list(Vprev), strat
 
+    def rl_policy_iteration(
+        self,
+        gamma: float,
+        iter_max: int,
+        verbose: int,
+        solver: str = 'auto',
+        tol: float = 1e-10
+    ) -> tuple[list[float], dict[str, str]]:
+        """Reinforcement Learning with Policy Iterations algorithm.
+        Compute the best positional strategy to maximize rewards, by evaluating
+        the values of a strategy, then improving it greedily, until it is stable.
+
+        Args:
+            gamma (float): The convergence factor, lower than 1.
+            iter_max (int): Max number of iterations.
+            verbose (int): The verbose level.
+            solver (str, optional): The solver of the evaluations, see `solve_linear`.
+            tol (float, optional): The tolerance of the iterative solvers. An
+                action is only changed if it improves the value by more than `tol`.
+
+        Returns:
+            tuple[list[float], dict[str, str]]: last Vn vector and the strategy found.
+        """
+        if verbose >= 1:
+            print("Begin optimization...")
+        start = perf_counter()
+        P = self.transition_matrix()
+        r = np.array(self.rewards, dtype=float)
+        states = np.arange(self.nb_states)
+        policy = np.argmax(self.enabled, axis=1)
+        V = np.zeros(self.nb_states)
+        i = 0
+        for i in range(1, iter_max + 1):
+            # evaluation: V = r + gamma * P_policy V
+            V = self.solve_linear(gamma * P[states * self.nb_actions + policy], r, solver, tol)
+            # improvement, keeping the current action on ties
+            Q = r[:, None] + gamma * (P @ V).reshape(self.nb_states, self.nb_actions)
+            Q[~self.enabled] = -np.inf
+            best = np.argmax(Q, axis=1)
+            improved = Q[states, best] > Q[states, policy] + tol
+            if not np.any(improved):
+                break
+            policy[improved] = best[improved]
+        if verbose >= 1:
+            print(f"Computed in {i} steps ({perf_counter() - start:.3f} s).")
+        strat = {sl: self.actions_labels[policy[sid]] for sl, sid in self.states_id.items()}
+        # affichage
+        if verbose >= 1:
+            print("Vn = ", [f"{x:.2f}" for x in V])
+            print("Strat = ", strat)
+        return list(V), strat
+
+    def value_iteration_in_place(
+        self,
+        gamma: float,
+        epsilon: float,
+        iter_max: int,
+        variant: str,
+        distance
+    ) -> tuple[np.ndarray, int]:
+        """Value iteration of the rewards updating the states one by one, in
+        the order of a variant of `rl_value_iteration`.
+
+        Args:
+            gamma (float): The convergence factor.
+            epsilon (float): The precision factor.
+            iter_max (int): Max number of sweeps over the states.
+            variant (str): 'gauss-seidel', 'topological' or 'prioritized'.
+            distance: The norm of the change of the values stopping the sweeps,
+                not used by 'prioritized', which stops on the sup norm of the residuals.
+
+        Returns:
+            tuple[np.ndarray, int]: The values, and the number of state updates.
+        """
+        V = np.zeros(self.nb_states)
+        rewards = [float(x) for x in self.rewards]
+        # transitions of each state, with the start of each enabled action among them
+        first = self.trans_ptr[::self.nb_actions].tolist()
+        starts = [self.trans_ptr[s * self.nb_actions + self.enabled_actions[
+                      self.enabled_ptr[s]:self.enabled_ptr[s + 1]]] - first[s]
+                  for s in range(self.nb_states)]
+        targets, probas = self.trans_target, self.trans_proba
+
+        def update(s: int) -> float:
+            """Update the value of a state, and returns its change."""
+            lo, hi = first[s], first[s + 1]
+            value = rewards[s] + gamma * np.max(np.add.reduceat(probas[lo:hi] * V[targets[lo:hi]], starts[s]))
+            change = value - V[s]
+            V[s] = value
+            return change
+
+        def sweeps(states: list[int], limit: int) -> int:
+            """Update the states in place until the values change by less than
+            epsilon, and returns the number of updates."""
+            i = 0
+            for i in range(1, limit + 1):
+                changes = np.array([update(s) for s in states])
+                if distance(changes) < epsilon:
+                    break
+            return i * len(states)
+
+        if variant == 'gauss-seidel':
+            return V, sweeps(list(range(self.nb_states)), iter_max)
+        if variant == 'topological':
+            backups = 0
+            for states in self.component_groups(np.arange(self.nb_states)):
+                states = states.tolist()
+                s = states[0]
+                if len(states) == 1 and s not in targets[first[s]:first[s + 1]]:
+                    update(s)
+                    backups += 1
+                else:
+                    backups += sweeps(states, iter_max)
+            return V, backups
+        # prioritized sweeping, on a heap of the residuals with outdated entries
+        predecessors = [self.pred_source[self.pred_ptr[s]:self.pred_ptr[s + 1]].tolist()
+                        for s in range(self.nb_states)]
+        P = self.transition_matrix()
+        Q = np.array(rewards)[:, None] + gamma * (P @ V).reshape(self.nb_states, self.nb_actions)
+        Q[~self.enabled] = -np.inf
+        residual = np.abs(np.max(Q, axis=1) - V).tolist()
+        heap = [(-res, s) for s, res in enumerate(residual) if res >= epsilon]
+        heapq.heapify(heap)
+        backups = 0
+        while heap and backups < iter_max * self.nb_states:
+            res, s = heapq.heappop(heap)
+            if -res != residual[s]:
+                continue
+            update(s)
+            residual[s] = 0
+            backups += 1
+            # the residuals of the predecessors, recomputed by a full backup
+            for p in predecessors[s]:
+                lo, hi = first[p], first[p + 1]
+                value = rewards[p] + gamma * np.max(np.add.reduceat(probas[lo:hi] * V[targets[lo:hi]], starts[p]))
+                residual[p] = abs(value - V[p])
+                if residual[p] >= epsilon:
+                    heapq.heappush(heap, (-residual[p], p))
+        return V, backups
+
     def rl_Q_learning(
         self,
         gamma: float,
@@ -518,26 +1682,149 @@ class MDP:
             verbose (int): The verbose level.
 
         Returns:
-            tuple[any, dict[str, str]]: The Q matrix and the strategy found.
-        """
-        Q = np.zeros((self.nb_states, self.nb_actions))
-        Qnext = Q.copy()
-        alpha = np.ones((self.nb_states, self.nb_actions))
-        for _ in range(iter_max):
-            st = np.random.randint(self.nb_states)
-            path, at = self.simulate(1, 'random', verbose-1, initial=st)
-            st1 = path[-1]
-            rt = self.rewards[st]
-            Q = Qnext.copy()
-            deltat = rt + gamma * np.max(Q[st1]) - Q[st][at]
-            Qnext[st][at] = Q[st][at] + deltat / alpha[st, at]
-            alpha[st, at] += 1
-        Q = Qnext.copy()
-        strat = { self.states_labels[s]: self.actions_labels[np.argmax(Q[s])]
+            tuple[np.ndarray, dict[str, str]]: The Q values of the enabled
+                actions, aligned with `enabled_actions`, and the strategy found.
+        """
+        # the updates are sequential: the tables are Python lists, faster to
+        # index one value at a time than arrays, and updated in place
+        Q = [0.] * len(self.enabled_actions)
+        alpha = [1] * len(self.enabled_actions)
+        ptr = self.enabled_ptr.tolist()
+        rewards = self.rewards
+        rng = np.random.default_rng()
+        # rank of each enabled action among the enabled actions of its state
+        ranks = np.cumsum(self.enabled, axis=1) - 1
+        block = max(1, min(iter_max, self.SIMULATION_BLOCK // 2))
+        for i in range(0, iter_max, block):
+            # the transitions of a block are drawn at once, from random states
+            starts = rng.integers(self.nb_states, size=min(block, iter_max - i))
+            paths, actions = self.simulate_batch(len(starts), 1, initial=starts, rng=rng,
+                                                 return_actions=True)
+            pairs = self.enabled_ptr[starts] + ranks[starts, actions[:, 0]]
+            for st, pt, st1 in zip(starts.tolist(), pairs.tolist(), paths[:, 1].tolist()):
+                deltat = rewards[st] + gamma * max(Q[ptr[st1]:ptr[st1 + 1]]) - Q[pt]
+                Q[pt] += deltat / alpha[pt]
+                alpha[pt] += 1
+        Q = np.array(Q)
+        best = self.enabled_actions[self.best_pairs(Q)]
+        strat = { self.states_labels[s]: self.actions_labels[best[s]]
                   for s in range(self.nb_states)
                 }
         if verbose >= 1:
-            print("Q = \n", Q)
+            self.print_q_values(Q)
+            print("Strat = ", strat)
+        return Q, strat
+
+    def best_pairs(self, Q: np.ndarray, states: np.ndarray | None = None) -> np.ndarray:
+        """Returns the enabled pair of highest Q value of each state, the first
+        one on ties.
+
+        Args:
+            Q (np.ndarray): The values of the enabled pairs, aligned with `enabled_actions`.
+            states (np.ndarray, optional): The states, all of them by default.
+
+        Returns:
+            np.ndarray: The index of the best pair of each state in `enabled_actions`.
+        """
+        if states is None:
+            states = np.arange(self.nb_states)
+        starts, ends = self.enabled_ptr[states], self.enabled_ptr[states + 1]
+        pairs = _ranges(starts, ends)
+        offsets = np.cumsum(ends - starts) - (ends - starts)
+        best = np.maximum.reduceat(Q[pairs], offsets)
+        # the candidates not reaching the max of their state are pushed past its end
+        candidates = np.where(Q[pairs] == np.repeat(best, ends - starts), pairs, np.iinfo(np.int64).max)
+        return np.minimum.reduceat(candidates, offsets)
+
+    def print_q_values(self, Q: np.ndarray) -> None:
+        """Print the Q values of the enabled actions of each state."""
+        print("Q = ")
+        for s, label in enumerate(self.states_labels):
+            pairs = range(self.enabled_ptr[s], self.enabled_ptr[s + 1])
+            print(f"  {label}:", ", ".join(
+                f"{self.actions_labels[self.enabled_actions[p]]}={Q[p]:.2f}" for p in pairs))
+
+    def rl_Q_learning_episodic(
+        self,
+        gamma: float,
+        iter_max: int,
+        verbose: int,
+        episode_length: int = 100,
+        exploration: float = 0.1,
+        n_envs: int = 64,
+        buffer_size: int = 100_000,
+        batch_size: int = 256,
+        seed: int | None = None
+    ) -> tuple[np.ndarray, dict[str, str]]:
+        """Reinforcement Learning with episodic Q-learning.
+        Computes the best strategy to maximize rewards, learning from episodes
+        which start from the initial state. Several episodes run in lockstep,
+        choosing the best known available action or, with the exploration
+        probability, a random one. Their transitions are stored in a replay
+        buffer, from which the Q matrix is updated by minibatches.
+
+        Args:
+            gamma (float): The convergence factor.
+            iter_max (int): Number of transitions to draw.
+            verbose (int): The verbose level.
+            episode_length (int, optional): Max number of steps of an episode,
+                which also ends after a step from an absorbing state. Defaults to 100.
+            exploration (float, optional): The probability to choose a random action. Defaults to 0.1.
+            n_envs (int, optional): The number of episodes run in lockstep. Defaults to 64.
+            buffer_size (int, optional): The number of transitions kept in the replay buffer. Defaults to 100.000.
+            batch_size (int, optional): The number of transitions of a minibatch,
+                one being applied after each step of the episodes. Defaults to 256.
+            seed (int, optional): The seed of the random generator.
+
+        Returns:
+            tuple[np.ndarray, dict[str, str]]: The Q values of the enabled
+                actions, aligned with `enabled_actions`, and the strategy found.
+        """
+        rng = np.random.default_rng(seed)
+        Q = np.zeros(len(self.enabled_actions))
+        visits = np.zeros(len(self.enabled_actions))
+        rewards = np.array(self.rewards, dtype=float)
+        # replay ring buffer of the (state, enabled pair, next state) transitions
+        buffer = np.zeros((3, buffer_size), dtype=np.int64)
+        position = size = 0
+        states = np.full(n_envs, self.initial_state)
+        steps = np.zeros(n_envs, dtype=np.int64)
+        episodes = 0
+        drawn = 0
+        while drawn < iter_max:
+            # epsilon-greedy choice among the available actions
+            pairs = self.draw_pairs(states, rng)
+            greedy = rng.random(n_envs) >= exploration
+            pairs[greedy] = self.best_pairs(Q, states[greedy])
+            rows = states * self.nb_actions + self.enabled_actions[pairs]
+            next_states = self.draw_successors(rows, rng.random(n_envs))
+            # store the transitions, overwriting the oldest ones
+            slots = (position + np.arange(n_envs)) % buffer_size
+            buffer[:, slots] = states, pairs, next_states
+            position = (position + n_envs) % buffer_size
+            size = min(size + n_envs, buffer_size)
+            drawn += n_envs
+            # minibatch update, the learning rate of a pair decreasing with its updates
+            s, p, s1 = buffer[:, rng.integers(size, size=batch_size)]
+            best = Q[self.best_pairs(Q, s1)]
+            deltas = rewards[s] + gamma * best - Q[p]
+            np.add.at(visits, p, 1)
+            np.add.at(Q, p, deltas / visits[p])
+            # restart the finished episodes, after one step in an absorbing state
+            steps += 1
+            done = (steps >= episode_length) | self.absorbing[states]
+            states = np.where(done, self.initial_state, next_states)
+            steps[done] = 0
+            episodes += np.count_nonzero(done)
+        best_actions = self.enabled_actions[self.best_pairs(Q)]
+        strat = { self.states_labels[s]: self.actions_labels[best_actions[s]]
+                  for s in range(self.nb_states)
+                }
+        if verbose >= 2:
+            visited = np.add.reduceat(visits, self.enabled_ptr[:-1]) > 0
+            print(f"{episodes} episodes, {np.count_nonzero(visited)} states visited")
+        if verbose >= 1:
+            self.print_q_values(Q)
             print("Strat = ", strat)
         return Q, strat
 
@@ -548,6 +1835,8 @@ class MDP:
         Args:
             output_file (str | None, optional): The name of the file to save in.
         """
+        import matplotlib.pyplot as plt
+        import networkx as nx
         G = nx.MultiDiGraph()
         nodes = []
         labels = []
@@ -559,12 +1848,12 @@ class MDP:
             labels.append(self.states_labels[s])
             colors.append("cyan")
             for a in self.actions_from(s):
+                targets, probas = self.successors(s, a)
                 if a == 0:
-                    for t in range(self.nb_states):
-                        if self.probas[s,a,t] != 0:
-                            G.add_edge(s, t)
-                            edge_labels.append(1)
-                            d[(s,t)] = str(1)
+                    for t in targets:
+                        G.add_edge(s, t)
+                        edge_labels.append(1)
+                        d[(s,t)] = str(1)
                 else:
                     nodes.append(f"{s}_{a}")
                     labels.append(self.actions_labels[a])
@@ -572,11 +1861,10 @@ class MDP:
                     G.add_edge(s,f"{s}_{a}")
                     edge_labels.append("")
                     d[(s,f"{s}_{a}")] = ""
-                    for t in range(self.nb_states):
-                        if self.probas[s,a,t] != 0:
-                            G.add_edge(f"{s}_{a}", t)
-                            edge_labels.append(str(self.probas[s,a,t]))
-                            d[(f"{s}_{a}",t)] = str(np.round(self.probas[s,a,t],2))
+                    for t, p in zip(targets, probas):
+                        G.add_edge(f"{s}_{a}", t)
+                        edge_labels.append(str(p))
+                        d[(f"{s}_{a}",t)] = str(np.round(p,2))
         pos = nx.spring_layout(G)
         nx.draw_networkx_nodes(G, nodelist=nodes, pos=pos, node_color=colors) # type: ignore
         nx.draw_networkx_labels(G, pos, {n:labels[i] for i, n in enumerate(nodes)})
@@ -587,3 +1875,129 @@ class MDP:
             plt.savefig(f"images/{name}.png")
         else:
             plt.show()
+
+
+# MDP shared by the calls of a worker process, see `MDP.map_blocks`
+_worker_mdp = None
+
+
+def _init_worker(mdp: MDP) -> None:
+    """Store the MDP in a worker process."""
+    global _worker_mdp
+    _worker_mdp = mdp
+
+
+def _run_in_worker(task, *args):
+    """Run a task on the MDP of the worker process."""
+    return task(_worker_mdp, *args)
+
+
+def _count_hits(
+    mdp: MDP,
+    n_runs: int,
+    n_steps: int,
+    stop: np.ndarray,
+    terminal_state: int,
+    stream: np.random.SeedSequence
+) -> tuple[int, int]:
+    """Count the runs reaching the terminal state in a block of simulations,
+    and the total number of steps simulated."""
+    final_states, lengths = mdp.simulate_until(
+        n_runs, n_steps, stop, rng=np.random.default_rng(stream))
+    return int(np.count_nonzero(final_states == terminal_state)), int(np.sum(lengths))
+
+
+def _draw_hits(
+    mdp: MDP,
+    n_runs: int,
+    n_steps: int,
+    stop: np.ndarray,
+    terminal_state: int,
+    stream: np.random.SeedSequence
+) -> np.ndarray:
+    """Returns which runs of a block of simulations reach the terminal state."""
+    final_states, _ = mdp.simulate_until(
+        n_runs, n_steps, stop, rng=np.random.default_rng(stream))
+    return final_states == terminal_state
+
+
+def _reaching(P: 'csr_matrix', targets: np.ndarray) -> np.ndarray:
+    """Returns the states of a Markov Chain with a path to the target states."""
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import breadth_first_order
+    n = len(targets)
+    P = P.tocoo()
+    # backward edges, and a last node leading to every target
+    sources = np.concatenate((P.col, np.full(np.count_nonzero(targets), n)))
+    destinations = np.concatenate((P.row, np.flatnonzero(targets)))
+    graph = csr_matrix((np.ones(len(sources)), (sources, destinations)), shape=(n + 1, n + 1))
+    reached = np.zeros(n + 1, dtype=bool)
+    reached[breadth_first_order(graph, n, return_predecessors=False)] = True
+    return reached[:n]
+
+
+def _tarjan(ptr: list[int], targets: np.ndarray) -> np.ndarray:
+    """Returns the strongly connected component of each node of a graph, whose
+    successors of `v` are `targets[ptr[v]:ptr[v+1]]`, with Tarjan's algorithm.
+    The components are numbered in reverse topological order: a component
+    only leads to components with a lower number."""
+    n = len(ptr) - 1
+    targets = targets.tolist()
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    component = [-1] * n
+    stack = []
+    counter = count = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        # depth-first search without recursion: the node, and its next successor
+        work = [(root, ptr[root])]
+        while work:
+            v, i = work[-1]
+            end = ptr[v + 1]
+            while i < end:
+                w = targets[i]
+                i += 1
+                if index[w] == -1:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, ptr[w]))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = count
+                        if w == v:
+                            break
+                    count += 1
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+    return np.array(component, dtype=np.int64)
+
+
+def _ranks_in_rows(entries: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the given sorted entries, with the rank of each one among the
+    entries of the same row."""
+    entry_rows = rows[entries]
+    return entries, np.arange(len(entries)) - np.searchsorted(entry_rows, entry_rows)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Returns the concatenation of the ranges [starts[i], ends[i])."""
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(np.sum(lengths)) + offsets